@@ -43,5 +43,26 @@ class Config:
         cls.DEFAULT_MODEL = "ollama/llama2"
         cls.DB_PATH = "amber_chat_history.db"
 
+        # Chat archiving: where archived chats go, when chats count as inactive and how often to check
+        cls.ARCHIVE_DB_PATH = os.getenv("ARCHIVE_DB_PATH", "amber_chat_archive.db")
+        cls.ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+        cls.ARCHIVE_INTERVAL_HOURS = float(os.getenv("ARCHIVE_INTERVAL_HOURS", "6"))
+
+        # Per-provider scheduling limits; None disables a rate limit
+        cls.PROVIDER_LIMITS = {
+            "openai": {"requests_per_minute": 60, "tokens_per_minute": 90000, "max_concurrency": 4},
+            "gemini": {"requests_per_minute": 60, "tokens_per_minute": None, "max_concurrency": 4},
+            "ollama": {"requests_per_minute": None, "tokens_per_minute": None, "max_concurrency": 1},
+        }
+
+        # USD per 1K (prompt, completion) tokens; unlisted models are treated as free
+        cls.MODEL_PRICING = {
+            "openai/gpt-3.5-turbo": (0.0005, 0.0015),
+            "openai/gpt-4": (0.03, 0.06),
+        }
+
+        # Seconds before the list of installed Ollama models is fetched again
+        cls.OLLAMA_MODELS_TTL = int(os.getenv("OLLAMA_MODELS_TTL", "60"))
+
 # Initialize config when module is imported
 Config.initialize()
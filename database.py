@@ -1,28 +1,105 @@
 # database.py
 import sqlite3
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 import json
+import threading
+import time
+import zlib
 
 class Database:
-    def __init__(self, db_path: str):
-        """Initialize database connection and create tables if they don't exist."""
+    # Seconds a connection waits for another session's write lock
+    BUSY_TIMEOUT = 30
+    # Chats moved per archive transaction, and pages freed per vacuum step,
+    # keeping each write lock short enough not to stall other sessions
+    ARCHIVE_BATCH_SIZE = 50
+    VACUUM_STEP_PAGES = 1000
+    # Pause between those steps so writers backing off on the lock get a turn
+    ARCHIVE_STEP_PAUSE = 0.05
+
+    def __init__(self, db_path: str, archive_path: Optional[str] = None):
+        """
+        Initialize database connection and create tables if they don't exist.
+        
+        Every method opens its own connection, so one instance can be shared
+        across threads; moves between the hot tables and the archive are
+        serialized so concurrent sessions cannot rehydrate a chat twice.
+        Archiving runs in a background thread at startup and then at most
+        every ARCHIVE_INTERVAL_HOURS.
+        """
+        from config import Config
         self.db_path = db_path
+        self.archive_path = archive_path or Config.ARCHIVE_DB_PATH
+        self._archive_lock = threading.Lock()
+        self._last_archive_run: Optional[float] = None
+        self._archive_thread: Optional[threading.Thread] = None
         print(f"Using database: {db_path}")
+        print(f"Using archive database: {self.archive_path}")
         self.init_db()
+        self._maybe_archive_stale_chats()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection to the hot database."""
+        return sqlite3.connect(self.db_path, timeout=self.BUSY_TIMEOUT)
+
+    def _connect_with_archive(self) -> sqlite3.Connection:
+        """Open a connection to the hot database with the archive attached as `archive`."""
+        conn = self._connect()
+        conn.execute("ATTACH DATABASE ? AS archive", (self.archive_path,))
+        return conn
+
+    def _maybe_archive_stale_chats(self) -> None:
+        """
+        Start an archiving pass in the background if none has started within
+        ARCHIVE_INTERVAL_HOURS, so callers on the page-render path never wait for it.
+        """
+        from config import Config
+        with self._archive_lock:
+            now = time.monotonic()
+            if (self._last_archive_run is not None
+                    and now - self._last_archive_run < Config.ARCHIVE_INTERVAL_HOURS * 3600):
+                return
+            if self._archive_thread and self._archive_thread.is_alive():
+                return
+            self._last_archive_run = now
+            self._archive_thread = threading.Thread(
+                target=self.archive_stale_chats,
+                args=(Config.ARCHIVE_AFTER_DAYS,),
+                name="amber-archiver",
+                daemon=True
+            )
+            self._archive_thread.start()
     
     def init_db(self) -> None:
         """Create necessary database tables if they don't exist."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
+            # Moves between the hot tables and the attached archive are only
+            # atomic across both files in rollback-journal mode, not in WAL mode
+            conn.execute("PRAGMA journal_mode=DELETE")
+
+            # Let the file shrink after archiving; existing databases need a
+            # one-time VACUUM before a new auto_vacuum mode takes effect
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                conn.execute("VACUUM")
+
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS chats (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     title TEXT NOT NULL,
                     model TEXT NOT NULL,
                     created_at TIMESTAMP NOT NULL,
-                    last_updated TIMESTAMP NOT NULL
+                    last_updated TIMESTAMP NOT NULL,
+                    last_accessed TIMESTAMP,
+                    archived INTEGER NOT NULL DEFAULT 0
                 )
             """)
+
+            # Databases created by older versions lack these columns
+            self._add_missing_columns(conn, "chats", {
+                "last_accessed": "TIMESTAMP",
+                "archived": "INTEGER NOT NULL DEFAULT 0"
+            })
             
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS messages (
@@ -32,10 +109,45 @@ class Database:
                     content TEXT NOT NULL,
                     timestamp TIMESTAMP NOT NULL,
                     file_id INTEGER,
+                    provider TEXT,
+                    model TEXT,
+                    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+                    completion_tokens INTEGER NOT NULL DEFAULT 0,
+                    latency_ms REAL NOT NULL DEFAULT 0,
+                    error INTEGER NOT NULL DEFAULT 0,
                     FOREIGN KEY (chat_id) REFERENCES chats (id),
                     FOREIGN KEY (file_id) REFERENCES attachments (id)
                 )
             """)
+
+            self._add_missing_columns(conn, "messages", {
+                "provider": "TEXT",
+                "model": "TEXT",
+                "prompt_tokens": "INTEGER NOT NULL DEFAULT 0",
+                "completion_tokens": "INTEGER NOT NULL DEFAULT 0",
+                "latency_ms": "REAL NOT NULL DEFAULT 0",
+                "error": "INTEGER NOT NULL DEFAULT 0"
+            })
+
+            # Rollups are maintained on insert so usage reports never scan messages
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS usage_daily (
+                    day TEXT NOT NULL,
+                    provider TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    request_count INTEGER NOT NULL DEFAULT 0,
+                    error_count INTEGER NOT NULL DEFAULT 0,
+                    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+                    completion_tokens INTEGER NOT NULL DEFAULT 0,
+                    total_latency_ms REAL NOT NULL DEFAULT 0,
+                    cost REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY (day, provider, model)
+                )
+            """)
+
+            self._add_missing_columns(conn, "usage_daily", {
+                "error_count": "INTEGER NOT NULL DEFAULT 0"
+            })
             
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS attachments (
@@ -47,6 +159,170 @@ class Database:
                     FOREIGN KEY (chat_id) REFERENCES chats (id)
                 )
             """)
+
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_messages_chat_id
+                ON messages (chat_id, timestamp)
+            """)
+
+        with self._connect_with_archive() as conn:
+            conn.execute("PRAGMA archive.journal_mode=DELETE")
+
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS archive.archived_chats (
+                    chat_id INTEGER PRIMARY KEY,
+                    archive_month TEXT NOT NULL,
+                    message_count INTEGER NOT NULL,
+                    payload BLOB NOT NULL,
+                    archived_at TIMESTAMP NOT NULL
+                )
+            """)
+
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS archive.idx_archived_chats_month
+                ON archived_chats (archive_month)
+            """)
+
+    @staticmethod
+    def _add_missing_columns(conn: sqlite3.Connection, table: str, columns: Dict[str, str]) -> None:
+        """Add any of `columns` (name -> definition) that `table` does not have yet."""
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        for name, definition in columns.items():
+            if name not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+    def archive_stale_chats(self, days: int) -> int:
+        """
+        Move messages of chats not updated or opened for `days` days into the archive database.
+        
+        Messages are stored as one zlib-compressed JSON payload per chat, grouped
+        by the month the chat was last updated. The chat row stays in the hot
+        `chats` table with `archived` set so it still shows up in the history.
+        
+        Args:
+            days (int): Inactivity threshold in days; values <= 0 disable archiving
+            
+        Returns:
+            int: Number of chats archived
+        """
+        if days <= 0:
+            return 0
+
+        cutoff = (datetime.now() - timedelta(days=days)).isoformat()
+        stale_condition = """
+            archived = 0 AND MAX(last_updated, COALESCE(last_accessed, last_updated)) < ?
+        """
+        archived = 0
+        conn = self._connect_with_archive()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT id FROM chats WHERE {stale_condition}", (cutoff,))
+            stale_chat_ids = [row[0] for row in cursor.fetchall()]
+
+            # Chats are moved in small batches, each its own transaction, so other
+            # sessions only ever wait for one batch rather than the whole pass
+            for start in range(0, len(stale_chat_ids), self.ARCHIVE_BATCH_SIZE):
+                with self._archive_lock, conn:
+                    for chat_id in stale_chat_ids[start:start + self.ARCHIVE_BATCH_SIZE]:
+                        archived += self._archive_chat(cursor, chat_id, stale_condition, cutoff)
+                time.sleep(self.ARCHIVE_STEP_PAUSE)
+
+            if archived:
+                # Return the freed pages to the filesystem a step at a time;
+                # executescript runs each step to completion, execute would not
+                while conn.execute("PRAGMA freelist_count").fetchone()[0]:
+                    conn.executescript(f"PRAGMA incremental_vacuum({self.VACUUM_STEP_PAGES});")
+                    time.sleep(self.ARCHIVE_STEP_PAUSE)
+        finally:
+            conn.close()
+
+        if archived:
+            print(f"Archived {archived} chats inactive for more than {days} days")
+        return archived
+
+    @staticmethod
+    def _archive_chat(cursor: sqlite3.Cursor, chat_id: int, stale_condition: str, cutoff: str) -> int:
+        """
+        Move one chat's messages into the archive within the caller's transaction.
+        
+        Returns:
+            int: 1 if the chat was archived, 0 if it was used since the pass started
+        """
+        cursor.execute(
+            f"SELECT last_updated FROM chats WHERE id = ? AND {stale_condition}",
+            (chat_id, cutoff)
+        )
+        row = cursor.fetchone()
+        if not row:
+            return 0
+        last_updated = row[0]
+        cursor.execute(
+            """
+            SELECT role, content, timestamp, file_id, provider, model,
+                   prompt_tokens, completion_tokens, latency_ms, error
+            FROM messages
+            WHERE chat_id = ?
+            ORDER BY timestamp ASC
+            """,
+            (chat_id,)
+        )
+        columns = [description[0] for description in cursor.description]
+        messages = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        payload = zlib.compress(json.dumps(messages).encode("utf-8"))
+        cursor.execute(
+            """
+            INSERT OR REPLACE INTO archive.archived_chats
+                (chat_id, archive_month, message_count, payload, archived_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (chat_id, last_updated[:7], len(messages), payload, datetime.now().isoformat())
+        )
+        cursor.execute("DELETE FROM messages WHERE chat_id = ?", (chat_id,))
+        cursor.execute("UPDATE chats SET archived = 1 WHERE id = ?", (chat_id,))
+        return 1
+
+    def _rehydrate_chat(self, chat_id: int) -> None:
+        """
+        Restore an archived chat's messages into the hot `messages` table.
+        
+        Args:
+            chat_id (int): ID of the archived chat
+        """
+        with self._archive_lock, self._connect_with_archive() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT archived FROM chats WHERE id = ?", (chat_id,))
+            row = cursor.fetchone()
+            if not (row and row[0]):
+                # Another session restored it while we waited for the lock
+                return
+            cursor.execute(
+                "SELECT payload FROM archive.archived_chats WHERE chat_id = ?",
+                (chat_id,)
+            )
+            row = cursor.fetchone()
+            if not row:
+                # Never clear the flag without the payload; that would lose the history
+                raise sqlite3.DatabaseError(f"Archived chat {chat_id} has no archive payload")
+            messages = json.loads(zlib.decompress(row[0]).decode("utf-8"))
+            cursor.executemany(
+                """
+                INSERT INTO messages (
+                    chat_id, role, content, timestamp, file_id, provider, model,
+                    prompt_tokens, completion_tokens, latency_ms, error
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (
+                        chat_id, m["role"], m["content"], m["timestamp"], m["file_id"],
+                        m.get("provider"), m.get("model"), m.get("prompt_tokens", 0),
+                        m.get("completion_tokens", 0), m.get("latency_ms", 0.0), m.get("error", 0)
+                    )
+                    for m in messages
+                ]
+            )
+            cursor.execute("DELETE FROM archive.archived_chats WHERE chat_id = ?", (chat_id,))
+            cursor.execute("UPDATE chats SET archived = 0 WHERE id = ?", (chat_id,))
     
     def create_chat(self, title: str, model: str) -> int:
         """
@@ -59,7 +335,7 @@ class Database:
         Returns:
             int: The ID of the newly created chat
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             now = datetime.now().isoformat()
             cursor.execute(
@@ -71,24 +347,57 @@ class Database:
             )
             return cursor.lastrowid
     
-    def save_message(self, chat_id: int, role: str, content: str, file_id: int = None) -> None:
+    def save_message(
+        self,
+        chat_id: int,
+        role: str,
+        content: str,
+        file_id: int = None,
+        provider: Optional[str] = None,
+        model: Optional[str] = None,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        latency_ms: float = 0.0,
+        error: bool = False
+    ) -> None:
         """
         Save a message to the database and prune old messages if necessary.
         
+        When a provider is given, the message's token usage is also added to
+        the daily usage rollup in the same transaction.
+        
         Args:
             chat_id (int): ID of the chat
             role (str): Message role (user/assistant)
             content (str): Message content
+            provider (Optional[str]): Provider that generated the message
+            model (Optional[str]): Model that generated the message
+            prompt_tokens (int): Prompt tokens reported by the provider
+            completion_tokens (int): Completion tokens reported by the provider
+            latency_ms (float): Time taken to generate the message
+            error (bool): Whether the message is an error reply from the provider
         """
-        with sqlite3.connect(self.db_path) as conn:
+        if self._is_archived(chat_id):
+            self._rehydrate_chat(chat_id)
+
+        with self._connect() as conn:
             now = datetime.now().isoformat()
             conn.execute(
                 """
-                INSERT INTO messages (chat_id, role, content, timestamp)
-                VALUES (?, ?, ?, ?)
+                INSERT INTO messages (
+                    chat_id, role, content, timestamp, file_id, provider, model,
+                    prompt_tokens, completion_tokens, latency_ms, error
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """,
-                (chat_id, role, content, now)
+                (chat_id, role, content, now, file_id, provider, model,
+                 prompt_tokens, completion_tokens, latency_ms, int(error))
             )
+            if provider:
+                self._update_usage_rollup(
+                    conn, now[:10], provider, model or "",
+                    prompt_tokens, completion_tokens, latency_ms, error
+                )
             conn.execute(
                 """
                 UPDATE chats SET last_updated = ? WHERE id = ?
@@ -123,14 +432,111 @@ class Database:
                     (chat_id, to_delete)
                 )
     
+    @staticmethod
+    def _update_usage_rollup(
+        conn: sqlite3.Connection,
+        day: str,
+        provider: str,
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        latency_ms: float,
+        error: bool = False
+    ) -> None:
+        """
+        Add one request's usage to the (day, provider, model) rollup row.
+        
+        Failed requests only increment `error_count`, so `request_count`
+        reflects successful requests.
+        """
+        from config import Config
+        prompt_price, completion_price = Config.MODEL_PRICING.get(f"{provider}/{model}", (0.0, 0.0))
+        cost = (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+        request_count, error_count = (0, 1) if error else (1, 0)
+        conn.execute(
+            """
+            INSERT INTO usage_daily (
+                day, provider, model, request_count, error_count, prompt_tokens,
+                completion_tokens, total_latency_ms, cost
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (day, provider, model) DO UPDATE SET
+                request_count = request_count + excluded.request_count,
+                error_count = error_count + excluded.error_count,
+                prompt_tokens = prompt_tokens + excluded.prompt_tokens,
+                completion_tokens = completion_tokens + excluded.completion_tokens,
+                total_latency_ms = total_latency_ms + excluded.total_latency_ms,
+                cost = cost + excluded.cost
+            """,
+            (day, provider, model, request_count, error_count,
+             prompt_tokens, completion_tokens, latency_ms, cost)
+        )
+
+    def record_usage(
+        self,
+        provider: str,
+        model: str,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        latency_ms: float = 0.0,
+        error: bool = False
+    ) -> None:
+        """
+        Add usage of a provider call that does not produce a stored message,
+        such as title generation, to the daily rollup.
+        
+        Args:
+            provider (str): Provider that served the request
+            model (str): Model that served the request
+            prompt_tokens (int): Prompt tokens reported by the provider
+            completion_tokens (int): Completion tokens reported by the provider
+            latency_ms (float): Time taken by the request
+            error (bool): Whether the request failed
+        """
+        with self._connect() as conn:
+            self._update_usage_rollup(
+                conn, datetime.now().isoformat()[:10], provider, model,
+                prompt_tokens, completion_tokens, latency_ms, error
+            )
+
+    def get_usage_summary(self, since: Optional[str] = None) -> List[Dict]:
+        """
+        Get token usage and cost per day, provider and model from the rollup table.
+        
+        Args:
+            since (Optional[str]): Earliest day to include (YYYY-MM-DD)
+            
+        Returns:
+            List[Dict]: Rollup rows, most recent day first
+        """
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT day, provider, model, request_count, error_count, prompt_tokens,
+                       completion_tokens, total_latency_ms, cost
+                FROM usage_daily
+                WHERE day >= ?
+                ORDER BY day DESC, provider, model
+                """,
+                (since or "",)
+            )
+            return [dict(row) for row in cursor.fetchall()]
+
     def get_all_chats(self) -> List[Dict]:
         """
         Get all chats ordered by last updated time.
         
+        Also triggers the archiving policy when it is due, since the history
+        is loaded on every page run.
+        
         Returns:
             List[Dict]: List of chat dictionaries
         """
-        with sqlite3.connect(self.db_path) as conn:
+        self._maybe_archive_stale_chats()
+
+        with self._connect() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             cursor.execute(
@@ -144,16 +550,7 @@ class Database:
     
     def get_chat_messages(self, chat_id: int) -> List[Dict]:
         """
-        Get all messages for a specific chat with attachment info.
-        
-        Args:
-            chat_id (int): ID of the chat
-            
-        Returns:
-            List[Dict]: List of message dictionaries with attachment info
-        """
-        """
-        Get all messages for a specific chat.
+        Get all messages for a specific chat, rehydrating it from the archive if needed.
         
         Args:
             chat_id (int): ID of the chat
@@ -161,7 +558,15 @@ class Database:
         Returns:
             List[Dict]: List of message dictionaries
         """
-        with sqlite3.connect(self.db_path) as conn:
+        if self._is_archived(chat_id):
+            self._rehydrate_chat(chat_id)
+
+        with self._connect() as conn:
+            # Reading a chat keeps it hot without reordering the history list
+            conn.execute(
+                "UPDATE chats SET last_accessed = ? WHERE id = ?",
+                (datetime.now().isoformat(), chat_id)
+            )
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             cursor.execute(
@@ -175,6 +580,14 @@ class Database:
             )
             return [dict(row) for row in cursor.fetchall()]
     
+    def _is_archived(self, chat_id: int) -> bool:
+        """Return True if the chat's messages currently live in the archive."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT archived FROM chats WHERE id = ?", (chat_id,))
+            row = cursor.fetchone()
+            return bool(row and row[0])
+    
     def get_chat(self, chat_id: int) -> Optional[Dict]:
         """
         Get chat details by ID.
@@ -185,7 +598,7 @@ class Database:
         Returns:
             Optional[Dict]: Chat details or None if not found
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             cursor.execute(
@@ -206,8 +619,9 @@ class Database:
         Args:
             chat_id (int): ID of the chat to delete
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect_with_archive() as conn:
             conn.execute("DELETE FROM messages WHERE chat_id = ?", (chat_id,))
+            conn.execute("DELETE FROM archive.archived_chats WHERE chat_id = ?", (chat_id,))
             conn.execute("DELETE FROM chats WHERE id = ?", (chat_id,))
     
     def update_chat_title(self, chat_id: int, new_title: str) -> None:
@@ -218,7 +632,7 @@ class Database:
             chat_id (int): ID of the chat
             new_title (str): New title for the chat
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             conn.execute(
                 """
                 UPDATE chats SET title = ?, last_updated = ?
@@ -239,7 +653,7 @@ class Database:
         Returns:
             int: Attachment ID
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             now = datetime.now().isoformat()
             cursor.execute(
@@ -254,11 +668,14 @@ class Database:
     def clear_all_history(self) -> None:
         """Delete all chat history from the database"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect_with_archive() as conn:
                 cursor = conn.cursor()
                 cursor.execute("DELETE FROM chats")
+                deleted = cursor.rowcount
                 cursor.execute("DELETE FROM messages")
+                deleted += cursor.rowcount
+                cursor.execute("DELETE FROM archive.archived_chats")
                 conn.commit()
-                print(f"Deleted {cursor.rowcount} records from chats and messages tables")
+                print(f"Deleted {deleted} records from chats and messages tables")
         except sqlite3.Error as e:
             print(f"Error clearing history: {e}")
@@ -5,13 +5,29 @@ from database import Database
 from config import Config
 import asyncio
 
+@st.cache_resource
+def get_debug_log():
+    """Open the debug log file once per process and share it across sessions"""
+    # Open in append mode to preserve existing logs
+    debug_log = open("debug.log", "a")
+    debug_log.write("Debug log initialized\n")
+    debug_log.flush()
+    return debug_log
+
+@st.cache_resource
+def get_router() -> ModelRouter:
+    """Create the model router and provider clients once per process"""
+    return ModelRouter()
+
+@st.cache_resource
+def get_database() -> Database:
+    """Create the database handle once per process"""
+    return Database(Config.DB_PATH)
+
 def init_debug_log():
-    """Initialize debug log file only once per session"""
+    """Attach the shared debug log to the session"""
     if "debug_log_initialized" not in st.session_state:
-        # Open in append mode to preserve existing logs
-        st.session_state.debug_log = open("debug.log", "a")
-        st.session_state.debug_log.write("Debug log initialized\n")
-        st.session_state.debug_log.flush()
+        st.session_state.debug_log = get_debug_log()
         st.session_state.debug_log_initialized = True
 
 def init_session_state():
@@ -23,9 +39,9 @@ def init_session_state():
     if "messages" not in st.session_state:
         st.session_state.messages = []
     if "router" not in st.session_state:
-        st.session_state.router = ModelRouter()
+        st.session_state.router = get_router()
     if "db" not in st.session_state:
-        st.session_state.db = Database(Config.DB_PATH)
+        st.session_state.db = get_database()
 
 def create_new_chat():
     st.session_state.messages = []
@@ -78,13 +94,19 @@ def main():
                     options=available_models.get(model_provider, []),
                     key="model_name"
                 )
-
-                # Set the selected model for Ollama
-                if model_provider == "ollama":
-                    model = st.session_state.router.get_model("ollama")
-                    if model:
-                        model.set_model(model_name)
         
+        # Token usage
+        with st.expander("Usage"):
+            usage = st.session_state.db.get_usage_summary()
+            if not usage:
+                st.caption("No usage recorded yet")
+            else:
+                st.dataframe(usage, hide_index=True)
+
+        # Request queues
+        with st.expander("Request Queues"):
+            st.json(st.session_state.router.get_scheduler_metrics())
+
         # Chat history
         st.subheader("Chat History")
                 
@@ -133,9 +155,18 @@ def main():
         # Create new chat if needed
         if not st.session_state.chat_id:
             try:
-                model = st.session_state.router.get_model(model_provider)
-                title = asyncio.run(model.get_title_from_first_message(prompt))
-                st.session_state.chat_id = st.session_state.db.create_chat(title, f"{model_provider}/{model_name}")
+                title = asyncio.run(
+                    st.session_state.router.get_title_from_first_message(model_provider, prompt, model_name)
+                )
+                st.session_state.db.record_usage(
+                    title.provider,
+                    title.model,
+                    prompt_tokens=title.prompt_tokens,
+                    completion_tokens=title.completion_tokens,
+                    latency_ms=title.latency_ms,
+                    error=title.error
+                )
+                st.session_state.chat_id = st.session_state.db.create_chat(title.content, f"{model_provider}/{model_name}")
                 st.session_state.db.save_message(st.session_state.chat_id, "user", prompt)
             except Exception as e:
                 st.error(f"Error creating new chat: {str(e)}")
@@ -144,12 +175,25 @@ def main():
         # Generate response
         with st.chat_message("assistant"):
             try:
-                model = st.session_state.router.get_model(model_provider)
                 with st.spinner("Thinking..."):
-                    response = asyncio.run(model.generate_response(st.session_state.messages))
-                st.write(response)
-                st.session_state.messages.append({"role": "assistant", "content": response})
-                st.session_state.db.save_message(st.session_state.chat_id, "assistant", response)
+                    response = asyncio.run(
+                        st.session_state.router.generate_response(
+                            model_provider, st.session_state.messages, model_name
+                        )
+                    )
+                st.write(response.content)
+                st.session_state.messages.append({"role": "assistant", "content": response.content})
+                st.session_state.db.save_message(
+                    st.session_state.chat_id,
+                    "assistant",
+                    response.content,
+                    provider=response.provider,
+                    model=response.model,
+                    prompt_tokens=response.prompt_tokens,
+                    completion_tokens=response.completion_tokens,
+                    latency_ms=response.latency_ms,
+                    error=response.error
+                )
             except Exception as e:
                 st.error(f"Error generating response: {str(e)}")
 
@@ -1,21 +1,44 @@
 # models/base_model.py
 import re
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from dataclasses import dataclass
+from typing import List, Dict, Optional
 from config import Config
 
+@dataclass
+class ModelResponse:
+    """A generated reply together with the usage reported by the provider."""
+    content: str
+    provider: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency_ms: float = 0.0
+    error: bool = False
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
 class BaseModel(ABC):
     def __init__(self, model_name: str):
         self.model_name = model_name
         self.config = Config()
     
     @abstractmethod
-    async def generate_response(self, messages: List[Dict[str, str]]) -> str:
-        """Generate a response from the model"""
+    async def generate_response(
+        self, messages: List[Dict[str, str]], model_name: Optional[str] = None
+    ) -> ModelResponse:
+        """Generate a response from the model along with its token usage.
+        `model_name` overrides the provider's default model for this request only,
+        so a shared instance never carries per-session state.
+        """
         pass
     
     @abstractmethod
-    async def get_title_from_first_message(self, message: str) -> str:
+    async def get_title_from_first_message(
+        self, message: str, model_name: Optional[str] = None
+    ) -> ModelResponse:
         """Generate a concise chat title from the first message.
         Creates a focused title under 32 characters from key topics.
         """
@@ -40,4 +63,4 @@ class BaseModel(ABC):
             else:
                 break
         title = ' '.join(title_parts).strip()
-        return title or "New Chat"
+        return ModelResponse(content=title or "New Chat", provider="", model=model_name or self.model_name)
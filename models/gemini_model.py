@@ -1,6 +1,7 @@
+import time
 import google.generativeai as genai
-from typing import List, Dict
-from .base_model import BaseModel
+from typing import List, Dict, Optional
+from .base_model import BaseModel, ModelResponse
 
 class GeminiModel(BaseModel):
     def __init__(self, model_name="gemini-pro"):
@@ -9,20 +10,63 @@ class GeminiModel(BaseModel):
         self.model = genai.GenerativeModel(model_name)
         self.available_models = ["gemini-pro", "gemini-2.0-flash-exp"]
 
-    async def generate_response(self, messages: List[Dict[str, str]]) -> str:
+    def _get_model(self, model_name: Optional[str]) -> genai.GenerativeModel:
+        """Return the default model, or a lightweight handle for another model name"""
+        if not model_name or model_name == self.model_name:
+            return self.model
+        return genai.GenerativeModel(model_name)
+
+    async def generate_response(
+        self, messages: List[Dict[str, str]], model_name: Optional[str] = None
+    ) -> ModelResponse:
+        model_name = model_name or self.model_name
+        start = time.perf_counter()
         try:
             prompt = "\n".join([f"{m['role']}: {m['content']}" for m in messages])
-            response = self.model.generate_content(prompt)
-            return response.text
+            response = self._get_model(model_name).generate_content(prompt)
+            # Older SDK releases do not report usage metadata
+            usage = getattr(response, "usage_metadata", None)
+            return ModelResponse(
+                content=response.text,
+                provider="gemini",
+                model=model_name,
+                prompt_tokens=getattr(usage, "prompt_token_count", 0) or 0,
+                completion_tokens=getattr(usage, "candidates_token_count", 0) or 0,
+                latency_ms=(time.perf_counter() - start) * 1000
+            )
         except Exception as e:
-            return f"Error generating response: {str(e)}"
+            return ModelResponse(
+                content=f"Error generating response: {str(e)}",
+                provider="gemini",
+                model=model_name,
+                latency_ms=(time.perf_counter() - start) * 1000,
+                error=True
+            )
 
-    async def get_title_from_first_message(self, message: str) -> str:
+    async def get_title_from_first_message(
+        self, message: str, model_name: Optional[str] = None
+    ) -> ModelResponse:
         """Generate a title from the first message"""
+        model_name = model_name or self.model_name
+        start = time.perf_counter()
         try:
-            response = self.model.generate_content(
+            response = self._get_model(model_name).generate_content(
                 f"Generate a short 2-3 word title for this chat: {message}"
             )
-            return response.text.strip().strip('"').strip("'")
+            usage = getattr(response, "usage_metadata", None)
+            return ModelResponse(
+                content=response.text.strip().strip('"').strip("'"),
+                provider="gemini",
+                model=model_name,
+                prompt_tokens=getattr(usage, "prompt_token_count", 0) or 0,
+                completion_tokens=getattr(usage, "candidates_token_count", 0) or 0,
+                latency_ms=(time.perf_counter() - start) * 1000
+            )
         except Exception as e:
-            return f"New Chat"
+            return ModelResponse(
+                content="New Chat",
+                provider="gemini",
+                model=model_name,
+                latency_ms=(time.perf_counter() - start) * 1000,
+                error=True
+            )
@@ -1,18 +1,43 @@
 # models/ollama_model.py
-from typing import List, Dict
-from .base_model import BaseModel
+from typing import List, Dict, Optional
+from .base_model import BaseModel, ModelResponse
+from config import Config
 import requests
 import json
+import threading
+import time
 
 class OllamaModel(BaseModel):
+    # Seconds to wait for the model list, so a hung Ollama host cannot hang a page
+    DISCOVERY_TIMEOUT = 5
+
     def __init__(self):
         self.base_url = "http://localhost:11434"
-        self.model_name = None
-        self.available_models = self.get_available_models()
+        self._available_models = self.get_available_models()
+        self._models_fetched_at = time.monotonic()
+        self._refresh_lock = threading.Lock()
+
+    @property
+    def available_models(self) -> List[str]:
+        """Installed models, re-discovered after OLLAMA_MODELS_TTL seconds so newly pulled models appear.
+        The refresh runs in a background thread; callers get the current list immediately.
+        """
+        expired = time.monotonic() - self._models_fetched_at >= Config.OLLAMA_MODELS_TTL
+        # Only one refresh at a time; other sessions keep using the stale list meanwhile
+        if expired and self._refresh_lock.acquire(blocking=False):
+            threading.Thread(target=self._refresh_available_models, daemon=True).start()
+        return self._available_models
+
+    def _refresh_available_models(self) -> None:
+        try:
+            self._available_models = self.get_available_models()
+            self._models_fetched_at = time.monotonic()
+        finally:
+            self._refresh_lock.release()
     
     def get_available_models(self) -> List[str]:
         try:
-            response = requests.get(f"{self.base_url}/api/tags")
+            response = requests.get(f"{self.base_url}/api/tags", timeout=self.DISCOVERY_TIMEOUT)
             if response.status_code == 200:
                 models_data = response.json().get("models", [])
                 return [model["name"] for model in models_data]
@@ -22,14 +47,14 @@ class OllamaModel(BaseModel):
             print(f"Error getting available models: {str(e)}")
             return []
     
-    def set_model(self, model_name: str) -> None:
-        """Set the model to use for generation"""
-        self.model_name = model_name
-    
-    async def generate_response(self, messages: List[Dict[str, str]]) -> str:
-        if not self.model_name:
-            return "Error: No model selected"
+    async def generate_response(
+        self, messages: List[Dict[str, str]], model_name: Optional[str] = None
+    ) -> ModelResponse:
+        # The instance is shared by all sessions, so the model always comes with the request
+        if not model_name:
+            return ModelResponse(content="Error: No model selected", provider="ollama", model="", error=True)
             
+        start = time.perf_counter()
         try:
             # Format messages for Ollama
             formatted_messages = [
@@ -44,7 +69,7 @@ class OllamaModel(BaseModel):
             response = requests.post(
                 f"{self.base_url}/api/chat",
                 json={
-                    "model": self.model_name,
+                    "model": model_name,
                     "messages": formatted_messages,
                     "stream": False
                 }
@@ -52,34 +77,72 @@ class OllamaModel(BaseModel):
             
             # Debug information
             print(f"Request to: {self.base_url}/api/chat")
-            print(f"Model: {self.model_name}")
+            print(f"Model: {model_name}")
             print(f"Status code: {response.status_code}")
             
+            latency_ms = (time.perf_counter() - start) * 1000
             if response.status_code == 200:
-                return response.json()["message"]["content"]
+                data = response.json()
+                return ModelResponse(
+                    content=data["message"]["content"],
+                    provider="ollama",
+                    model=model_name,
+                    prompt_tokens=data.get("prompt_eval_count", 0),
+                    completion_tokens=data.get("eval_count", 0),
+                    latency_ms=latency_ms
+                )
             elif response.status_code == 404:
-                return f"Error: Model '{self.model_name}' not found. Please make sure the model is properly installed in Ollama."
+                content = f"Error: Model '{model_name}' not found. Please make sure the model is properly installed in Ollama."
             else:
-                return f"Error: HTTP {response.status_code} - {response.text}"
+                content = f"Error: HTTP {response.status_code} - {response.text}"
+            return ModelResponse(
+                content=content, provider="ollama", model=model_name, latency_ms=latency_ms, error=True
+            )
         except Exception as e:
-            return f"Error generating response: {str(e)}"
+            return ModelResponse(
+                content=f"Error generating response: {str(e)}",
+                provider="ollama",
+                model=model_name,
+                latency_ms=(time.perf_counter() - start) * 1000,
+                error=True
+            )
     
-    async def get_title_from_first_message(self, message: str) -> str:
-        if not self.model_name:
-            return "New Chat"
+    async def get_title_from_first_message(
+        self, message: str, model_name: Optional[str] = None
+    ) -> ModelResponse:
+        if not model_name:
+            return ModelResponse(content="New Chat", provider="ollama", model="", error=True)
             
+        start = time.perf_counter()
         try:
             response = requests.post(
                 f"{self.base_url}/api/generate",
                 json={
-                    "model": self.model_name,
+                    "model": model_name,
                     "prompt": "Generate a very short title (3-5 words) for a chat that starts with this message: " + message,
                     "stream": False
                 }
             )
             
+            latency_ms = (time.perf_counter() - start) * 1000
             if response.status_code == 200:
-                return response.json()["response"].strip()
-            return "New Chat"
+                data = response.json()
+                return ModelResponse(
+                    content=data["response"].strip(),
+                    provider="ollama",
+                    model=model_name,
+                    prompt_tokens=data.get("prompt_eval_count", 0),
+                    completion_tokens=data.get("eval_count", 0),
+                    latency_ms=latency_ms
+                )
+            return ModelResponse(
+                content="New Chat", provider="ollama", model=model_name, latency_ms=latency_ms, error=True
+            )
         except Exception:
-            return "New Chat"
\ No newline at end of file
+            return ModelResponse(
+                content="New Chat",
+                provider="ollama",
+                model=model_name,
+                latency_ms=(time.perf_counter() - start) * 1000,
+                error=True
+            )
\ No newline at end of file
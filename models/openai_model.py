@@ -1,34 +1,77 @@
 # models/openai_model.py
-from typing import List, Dict
-from .base_model import BaseModel
-from openai import AsyncOpenAI
+import asyncio
+import time
+from typing import List, Dict, Optional
+from .base_model import BaseModel, ModelResponse
+from openai import OpenAI
 from config import Config
 
 class OpenAIModel(BaseModel):
     def __init__(self):
         if not Config.OPENAI_API_KEY:
             raise ValueError("OpenAI API key is not set")
-        self.client = AsyncOpenAI(api_key=Config.OPENAI_API_KEY)
+        # The synchronous client is thread-safe and, unlike AsyncOpenAI, not tied
+        # to one event loop, so a single instance can serve every session
+        self.client = OpenAI(api_key=Config.OPENAI_API_KEY)
+        self.default_model = "gpt-3.5-turbo"
     
-    async def generate_response(self, messages: List[Dict[str, str]]) -> str:
+    async def generate_response(
+        self, messages: List[Dict[str, str]], model_name: Optional[str] = None
+    ) -> ModelResponse:
+        model = model_name or self.default_model
+        start = time.perf_counter()
         try:
-            response = await self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
+            response = await asyncio.to_thread(
+                self.client.chat.completions.create,
+                model=model,
                 messages=messages
             )
-            return response.choices[0].message.content
+            usage = response.usage
+            return ModelResponse(
+                content=response.choices[0].message.content,
+                provider="openai",
+                model=model,
+                prompt_tokens=usage.prompt_tokens if usage else 0,
+                completion_tokens=usage.completion_tokens if usage else 0,
+                latency_ms=(time.perf_counter() - start) * 1000
+            )
         except Exception as e:
-            return f"Error generating response: {str(e)}"
+            return ModelResponse(
+                content=f"Error generating response: {str(e)}",
+                provider="openai",
+                model=model,
+                latency_ms=(time.perf_counter() - start) * 1000,
+                error=True
+            )
     
-    async def get_title_from_first_message(self, message: str) -> str:
+    async def get_title_from_first_message(
+        self, message: str, model_name: Optional[str] = None
+    ) -> ModelResponse:
+        model = model_name or self.default_model
+        start = time.perf_counter()
         try:
-            response = await self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
+            response = await asyncio.to_thread(
+                self.client.chat.completions.create,
+                model=model,
                 messages=[
                     {"role": "system", "content": "Generate a short, concise title (3-5 words) for this conversation based on the user's first message."},
                     {"role": "user", "content": message}
                 ]
             )
-            return response.choices[0].message.content
+            usage = response.usage
+            return ModelResponse(
+                content=response.choices[0].message.content,
+                provider="openai",
+                model=model,
+                prompt_tokens=usage.prompt_tokens if usage else 0,
+                completion_tokens=usage.completion_tokens if usage else 0,
+                latency_ms=(time.perf_counter() - start) * 1000
+            )
         except Exception as e:
-            return "New Chat"
\ No newline at end of file
+            return ModelResponse(
+                content="New Chat",
+                provider="openai",
+                model=model,
+                latency_ms=(time.perf_counter() - start) * 1000,
+                error=True
+            )
\ No newline at end of file
@@ -3,13 +3,22 @@ from typing import Dict, List, Optional
 from models.openai_model import OpenAIModel
 from models.ollama_model import OllamaModel
 from models.gemini_model import GeminiModel
-from models.base_model import BaseModel
+from models.base_model import BaseModel, ModelResponse
+from scheduler import Priority, ProviderScheduler, get_provider_scheduler
+from config import Config
 
 class ModelRouter:
     def __init__(self):
-        """Initialize the ModelRouter with available AI models."""
+        """
+        Initialize the ModelRouter with available AI models.
+        
+        A single router is shared by all sessions, so models must not hold
+        per-session state; the model name is passed with each request instead.
+        """
         self.models: Dict[str, BaseModel] = {}
+        self.schedulers: Dict[str, ProviderScheduler] = {}
         self._initialize_models()
+        self._initialize_schedulers()
         self.default_provider = "ollama"
 
     def _initialize_models(self) -> None:
@@ -29,6 +38,90 @@ class ModelRouter:
         except Exception as e:
             print(f"Failed to initialize Gemini model: {e}")
 
+    def _initialize_schedulers(self) -> None:
+        """Attach the process-wide request scheduler of every initialized provider."""
+        for provider in self.models:
+            limits = Config.PROVIDER_LIMITS.get(provider, {})
+            self.schedulers[provider] = get_provider_scheduler(provider, **limits)
+
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        """Rough token estimate used to reserve capacity before a request."""
+        return len(text) // 4 + 1
+
+    async def generate_response(
+        self,
+        provider: str,
+        messages: List[Dict[str, str]],
+        model_name: Optional[str] = None,
+        priority: Priority = Priority.INTERACTIVE
+    ) -> ModelResponse:
+        """
+        Generate a response through the provider's scheduler.
+        
+        Args:
+            provider (str): Name of the provider to use
+            messages (List[Dict[str, str]]): Conversation so far
+            model_name (Optional[str]): Model to use instead of the provider default
+            priority (Priority): Scheduling lane for the request
+            
+        Returns:
+            ModelResponse: The generated response and its usage
+        """
+        provider = provider.lower()
+        model = self.models[provider]
+        scheduler = self.schedulers[provider]
+        estimated_tokens = self._estimate_tokens("".join(m["content"] for m in messages))
+        await scheduler.acquire(priority, estimated_tokens)
+        actual_tokens = None
+        try:
+            response = await model.generate_response(messages, model_name)
+            actual_tokens = response.total_tokens or None
+            return response
+        finally:
+            scheduler.release(estimated_tokens, actual_tokens)
+
+    async def get_title_from_first_message(
+        self,
+        provider: str,
+        message: str,
+        model_name: Optional[str] = None,
+        priority: Priority = Priority.INTERACTIVE
+    ) -> ModelResponse:
+        """
+        Generate a chat title through the provider's scheduler.
+        
+        Args:
+            provider (str): Name of the provider to use
+            message (str): First message of the chat
+            model_name (Optional[str]): Model to use instead of the provider default
+            priority (Priority): Scheduling lane for the request
+            
+        Returns:
+            ModelResponse: Generated chat title and its usage
+        """
+        provider = provider.lower()
+        model = self.models[provider]
+        scheduler = self.schedulers[provider]
+        estimated_tokens = self._estimate_tokens(message)
+        await scheduler.acquire(priority, estimated_tokens)
+        actual_tokens = None
+        try:
+            response = await model.get_title_from_first_message(message, model_name)
+            actual_tokens = response.total_tokens or None
+            return response
+        finally:
+            scheduler.release(estimated_tokens, actual_tokens)
+
+    def get_scheduler_metrics(self) -> Dict[str, Dict]:
+        """
+        Get queue depth and wait-time metrics for every provider.
+        
+        Returns:
+            Dict[str, Dict]: Scheduler metrics keyed by provider
+        """
+        return {provider: scheduler.get_metrics() for provider, scheduler in self.schedulers.items()}
+
     def get_model(self, model_name: str) -> Optional[BaseModel]:
         """
         Get a specific model by name.
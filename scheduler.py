@@ -0,0 +1,228 @@
+# scheduler.py
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from enum import IntEnum
+from typing import Dict, Optional
+
+class Priority(IntEnum):
+    """Request lanes; lower values are served first."""
+    INTERACTIVE = 0
+    BATCH = 1
+
+class TokenBucket:
+    def __init__(self, capacity: float, refill_per_second: float):
+        """
+        Initialize a bucket that starts full and refills continuously.
+
+        Args:
+            capacity (float): Maximum number of units the bucket holds
+            refill_per_second (float): Units added back per second
+        """
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.level = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated_at) * self.refill_per_second)
+        self.updated_at = now
+
+    def delay_for(self, amount: float) -> float:
+        """
+        Get the number of seconds until `amount` units are available.
+
+        Requests larger than the bucket only wait for a full bucket so they
+        cannot block forever.
+        """
+        self._refill()
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.refill_per_second)
+
+    def consume(self, amount: float) -> None:
+        """Take `amount` units; negative amounts return units to the bucket."""
+        self._refill()
+        self.level = min(self.capacity, self.level - amount)
+
+class ProviderScheduler:
+    def __init__(
+        self,
+        provider: str,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        max_concurrency: int = 1
+    ):
+        """
+        Initialize the scheduler for one provider.
+
+        Waiting requests are admitted strictly in priority order, so queued
+        interactive requests always start before queued batch requests.
+        The scheduler is thread-safe and may be shared across event loops.
+
+        Args:
+            provider (str): Provider name, used in metrics
+            requests_per_minute (Optional[int]): Request rate limit, None for unlimited
+            tokens_per_minute (Optional[int]): Token rate limit, None for unlimited
+            max_concurrency (int): Maximum number of requests in flight
+        """
+        self.provider = provider
+        self.max_concurrency = max_concurrency
+        self._request_bucket = (
+            TokenBucket(requests_per_minute, requests_per_minute / 60) if requests_per_minute else None
+        )
+        self._token_bucket = (
+            TokenBucket(tokens_per_minute, tokens_per_minute / 60) if tokens_per_minute else None
+        )
+        self._condition = threading.Condition()
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._active = 0
+        self._stats = {
+            priority: {"started": 0, "total_wait_ms": 0.0, "max_wait_ms": 0.0}
+            for priority in Priority
+        }
+
+    def _rate_limit_delay(self, estimated_tokens: int) -> float:
+        delay = 0.0
+        if self._request_bucket:
+            delay = max(delay, self._request_bucket.delay_for(1))
+        if self._token_bucket:
+            delay = max(delay, self._token_bucket.delay_for(estimated_tokens))
+        return delay
+
+    def _acquire_blocking(self, priority: Priority, estimated_tokens: int, request: Dict) -> Optional[float]:
+        ticket = (int(priority), next(self._sequence))
+        start = time.monotonic()
+        with self._condition:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    if request["abandoned"]:
+                        # The caller was cancelled; leave the queue without taking a slot
+                        self._waiting.remove(ticket)
+                        heapq.heapify(self._waiting)
+                        self._condition.notify_all()
+                        return None
+                    if self._waiting[0] == ticket and self._active < self.max_concurrency:
+                        delay = self._rate_limit_delay(estimated_tokens)
+                        if delay == 0:
+                            break
+                        self._condition.wait(delay)
+                    else:
+                        self._condition.wait()
+            except BaseException:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._condition.notify_all()
+                raise
+
+            heapq.heappop(self._waiting)
+            self._active += 1
+            request["acquired"] = True
+            if self._request_bucket:
+                self._request_bucket.consume(1)
+            if self._token_bucket:
+                self._token_bucket.consume(estimated_tokens)
+
+            wait_ms = (time.monotonic() - start) * 1000
+            stats = self._stats[priority]
+            stats["started"] += 1
+            stats["total_wait_ms"] += wait_ms
+            stats["max_wait_ms"] = max(stats["max_wait_ms"], wait_ms)
+
+            # The next request in line may be able to start as well
+            self._condition.notify_all()
+            return wait_ms
+
+    async def acquire(self, priority: Priority = Priority.INTERACTIVE, estimated_tokens: int = 0) -> float:
+        """
+        Wait for a free slot within the provider's limits.
+
+        Args:
+            priority (Priority): Lane to queue the request in
+            estimated_tokens (int): Tokens to reserve against the token limit
+
+        Returns:
+            float: Time spent waiting in milliseconds
+        """
+        # Block in a worker thread so other tasks on this loop can release slots
+        request = {"abandoned": False, "acquired": False}
+        waiting = asyncio.ensure_future(
+            asyncio.to_thread(self._acquire_blocking, priority, estimated_tokens, request)
+        )
+        try:
+            return await asyncio.shield(waiting)
+        except asyncio.CancelledError:
+            # The worker thread keeps running after cancellation. Settle the
+            # request under the lock so the slot is never leaked: either the
+            # worker already took it and we hand it back, or it gives up
+            with self._condition:
+                if request["acquired"]:
+                    self.release(estimated_tokens)
+                else:
+                    request["abandoned"] = True
+                    self._condition.notify_all()
+            raise
+
+    def release(self, estimated_tokens: int = 0, actual_tokens: Optional[int] = None) -> None:
+        """
+        Free a slot and settle the token reservation against actual usage.
+
+        Args:
+            estimated_tokens (int): Tokens reserved in `acquire`
+            actual_tokens (Optional[int]): Tokens reported by the provider, if known
+        """
+        with self._condition:
+            self._active -= 1
+            if self._token_bucket and actual_tokens is not None:
+                self._token_bucket.consume(actual_tokens - estimated_tokens)
+            self._condition.notify_all()
+
+    def get_metrics(self) -> Dict:
+        """
+        Get queue depth, concurrency and wait-time statistics.
+
+        Returns:
+            Dict: Metrics for this provider, with per-lane breakdowns
+        """
+        with self._condition:
+            lanes = {}
+            for priority in Priority:
+                stats = self._stats[priority]
+                lanes[priority.name.lower()] = {
+                    "queue_depth": sum(1 for p, _ in self._waiting if p == priority),
+                    "started": stats["started"],
+                    "avg_wait_ms": stats["total_wait_ms"] / stats["started"] if stats["started"] else 0.0,
+                    "max_wait_ms": stats["max_wait_ms"],
+                }
+            return {
+                "provider": self.provider,
+                "active": self._active,
+                "max_concurrency": self.max_concurrency,
+                "lanes": lanes,
+            }
+
+_schedulers: Dict[str, ProviderScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+def get_provider_scheduler(provider: str, **limits) -> ProviderScheduler:
+    """
+    Get the process-wide scheduler for a provider, creating it on first use.
+
+    Every router and session in the process shares the returned scheduler,
+    so limits apply to all traffic to the provider, not per session.
+
+    Args:
+        provider (str): Provider name
+        **limits: ProviderScheduler limits, used only when the scheduler is created
+
+    Returns:
+        ProviderScheduler: The shared scheduler for the provider
+    """
+    with _schedulers_lock:
+        if provider not in _schedulers:
+            _schedulers[provider] = ProviderScheduler(provider, **limits)
+        return _schedulers[provider]
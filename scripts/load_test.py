@@ -0,0 +1,153 @@
+# scripts/load_test.py
+"""
+Measure per-session overhead of the shared router and database.
+
+Each simulated browser session is a full run of main.py through
+Streamlit's AppTest, so st.cache_resource behaves as it does under
+`streamlit run`. Sessions are kept alive, as they would be for users who
+are connected at the same time. Two modes are compared:
+
+  shared       the cached router and database are reused by every session
+  per-session  resource caches are cleared before each session, which
+               reproduces building a new router and database per session
+
+After that, the shared database and router are used from many threads
+at once. This checks that concurrent rehydration of one archived chat
+stays consistent.
+
+Run from the project root:
+    python scripts/load_test.py --sessions 1 10 50
+"""
+import argparse
+import contextlib
+import io
+import os
+import pathlib
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+PROJECT_DIR = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_DIR))
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+from config import Config
+
+MAIN_SCRIPT = str(PROJECT_DIR / "main.py")
+
+def run_session() -> AppTest:
+    """Run main.py once as a new browser session."""
+    at = AppTest.from_file(MAIN_SCRIPT, default_timeout=60).run()
+    if at.exception:
+        raise RuntimeError(f"Session failed: {at.exception[0].value}")
+    return at
+
+def measure_sessions(sessions: int, shared: bool) -> dict:
+    """
+    Start `sessions` sessions, keeping them all alive, and measure the cost.
+
+    Returns:
+        dict: Wall time, retained memory and distinct router/database objects
+    """
+    st.cache_resource.clear()
+    live_sessions = []
+
+    # The models and database print debug output on construction
+    with contextlib.redirect_stdout(io.StringIO()):
+        tracemalloc.start()
+        start = time.perf_counter()
+        for _ in range(sessions):
+            if not shared:
+                st.cache_resource.clear()
+            live_sessions.append(run_session())
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        retained, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "elapsed_ms": elapsed_ms,
+        "retained_kb": retained / 1024,
+        "routers": len({id(at.session_state.router) for at in live_sessions}),
+        "databases": len({id(at.session_state.db) for at in live_sessions}),
+        "router": live_sessions[-1].session_state.router,
+        "db": live_sessions[-1].session_state.db,
+    }
+
+def check_concurrent_rehydration(db, router, threads: int, message_count: int = 20) -> bool:
+    """Archive a chat, then read it and list models from `threads` threads at once."""
+    chat_id = db.create_chat("load test", "ollama/test")
+    for i in range(message_count):
+        db.save_message(chat_id, "user", f"message {i}")
+    with sqlite3.connect(db.db_path) as conn:
+        conn.execute(
+            "UPDATE chats SET last_updated = ?, last_accessed = NULL WHERE id = ?",
+            ("2000-01-01T00:00:00", chat_id)
+        )
+    with contextlib.redirect_stdout(io.StringIO()):
+        db.archive_stale_chats(Config.ARCHIVE_AFTER_DAYS or 1)
+
+    counts = []
+    failures = []
+    lock = threading.Lock()
+
+    def session():
+        try:
+            router.get_available_models()
+            messages = db.get_chat_messages(chat_id)
+            with lock:
+                counts.append(len(messages))
+        except Exception as e:
+            with lock:
+                failures.append(e)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        workers = [threading.Thread(target=session) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    consistent = not failures and counts == [message_count] * threads
+    print(f"Concurrent rehydration by {threads} threads: "
+          f"{'consistent' if consistent else 'INCONSISTENT'} "
+          f"(message counts: {sorted(set(counts))}, errors: {len(failures)})")
+    return consistent
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 50],
+                        help="Numbers of concurrent sessions to simulate")
+    args = parser.parse_args()
+
+    # Keep the load test's databases and debug log away from the real ones
+    workdir = tempfile.mkdtemp(prefix="amber_load_test_")
+    os.chdir(workdir)
+    Config.DB_PATH = os.path.join(workdir, "history.db")
+    Config.ARCHIVE_DB_PATH = os.path.join(workdir, "archive.db")
+
+    # Warm up imports so they are not charged to the first measurement
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_session()
+
+    print(f"{'sessions':>8}  {'mode':<11}  {'ms/session':>10}  {'KB/session':>10}  {'routers':>7}  {'dbs':>4}")
+    ok = True
+    for sessions in args.sessions:
+        for shared in (True, False):
+            stats = measure_sessions(sessions, shared)
+            print(f"{sessions:>8}  {'shared' if shared else 'per-session':<11}  "
+                  f"{stats['elapsed_ms'] / sessions:>10.1f}  {stats['retained_kb'] / sessions:>10.1f}  "
+                  f"{stats['routers']:>7}  {stats['databases']:>4}")
+            if shared and (stats["routers"] != 1 or stats["databases"] != 1):
+                print("Shared mode created more than one router or database")
+                ok = False
+
+    stats = measure_sessions(1, shared=True)
+    ok = check_concurrent_rehydration(stats["db"], stats["router"], max(args.sessions)) and ok
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())